@@ -5,11 +5,15 @@ set -euo pipefail
 DOCKER_USER="pwhite00"
 IMAGE_NAME="read_me_later"
 ALL_ARCHS="linux/amd64 linux/arm64 linux/arm/v7"
+BENCH_RUNS="${BENCH_RUNS:-10}"
 
 function usage {
     cat <<EOF
-Usage: $0 [publish|publish-all|build|{blank}]
+Usage: $0 [publish|publish-all|build|build-fast|zipapp|benchmark|{blank}]
     build: build the image for the current architecture (default)
+    build-fast: build the startup-optimized image for the current architecture
+    zipapp: export the single-file dist/read_me_later.pyz
+    benchmark: build both images and compare their cold-start times
     publish: build and publish the image for the current architecture
     publish-all: build and publish the image for all architectures
     blank: same as build
@@ -17,6 +21,9 @@ Usage: $0 [publish|publish-all|build|{blank}]
 Examples:
     $0                    # Build for current arch
     $0 build             # Build for current arch
+    $0 build-fast        # Build the fast-start image (tagged -fast)
+    $0 zipapp            # Write dist/read_me_later.pyz
+    BENCH_RUNS=20 $0 benchmark  # Compare cold starts over 20 runs each
     $0 publish           # Build and publish for current arch
     $0 publish-all       # Build and publish for all architectures
 EOF
@@ -39,10 +46,11 @@ function build_single_arch() {
     local arch=$1
     local tag_suffix=$2
     local publish_mode=$3
+    local target=${4:-standard}
     local date_tag=$(date +%Y%m%d%H%M%S)
     
-    echo "Building for $arch..."
-    docker build --platform $arch -t $IMAGE_NAME:$date_tag$tag_suffix .
+    echo "Building $target image for $arch..."
+    docker build --platform $arch --target "$target" -t $IMAGE_NAME:$date_tag$tag_suffix .
     
     if [[ "$publish_mode" == "publish" || "$publish_mode" == "publish-all" ]]; then
         echo "Tagging for Docker Hub..."
@@ -55,6 +63,56 @@ function build_single_arch() {
     fi
 }
 
+function build_zipapp() {
+    echo "Exporting zipapp to dist/read_me_later.pyz..."
+    docker build --target zipapp --output type=local,dest=dist .
+}
+
+function time_cold_start() {
+    local label=$1
+    shift
+
+    # Each docker run is a fresh container, so every run is a cold interpreter start
+    python3 - "$label" "$BENCH_RUNS" "$@" <<'PYTHON'
+import statistics
+import subprocess
+import sys
+import time
+
+label, runs, cmd = sys.argv[1], int(sys.argv[2]), sys.argv[3:]
+timings = []
+for _ in range(runs):
+    start = time.perf_counter()
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    timings.append((time.perf_counter() - start) * 1000)
+
+print("{:<10} min {:7.1f} ms   median {:7.1f} ms   mean {:7.1f} ms".format(
+    label, min(timings), statistics.median(timings), statistics.mean(timings)))
+PYTHON
+}
+
+function benchmark() {
+    local arch
+    arch=$(get_current_arch)
+    local python_image
+    python_image=$(sed -n 's/^ARG PYTHON_IMAGE=//p' Dockerfile)
+
+    echo "Building benchmark images for $arch..."
+    docker build --platform "$arch" --target standard -t "$IMAGE_NAME:bench-standard" .
+    docker build --platform "$arch" --target fast -t "$IMAGE_NAME:bench-fast" .
+    build_zipapp
+
+    # Warm up so image layers are unpacked and cached before timing
+    docker run --rm "$IMAGE_NAME:bench-standard" --help >/dev/null
+    docker run --rm "$IMAGE_NAME:bench-fast" --help >/dev/null
+    docker run --rm -v "$(pwd)/dist:/dist:ro" "$python_image" python /dist/read_me_later.pyz --help >/dev/null
+
+    echo "Cold-start time of 'docker run --rm ... --help' ($BENCH_RUNS runs each):"
+    time_cold_start "standard" docker run --rm "$IMAGE_NAME:bench-standard" --help
+    time_cold_start "fast" docker run --rm "$IMAGE_NAME:bench-fast" --help
+    time_cold_start "zipapp" docker run --rm -v "$(pwd)/dist:/dist:ro" "$python_image" python /dist/read_me_later.pyz --help
+}
+
 # Parse arguments
 case "${1:-build}" in
     "publish")
@@ -77,6 +135,19 @@ case "${1:-build}" in
         echo "ARCH: $(get_current_arch)"
         build_single_arch "$(get_current_arch)" "" "build"
         ;;
+    "build-fast")
+        echo "BUILD is FAST START MODE"
+        echo "ARCH: $(get_current_arch)"
+        build_single_arch "$(get_current_arch)" "-fast" "build" "fast"
+        ;;
+    "zipapp")
+        echo "BUILD is ZIPAPP MODE"
+        build_zipapp
+        ;;
+    "benchmark")
+        echo "BUILD is BENCHMARK MODE"
+        benchmark
+        ;;
     *)
         echo "Unknown build mode: $1"
         usage
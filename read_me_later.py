@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import requests
+import urllib3
 import json
 import os
 import sys
@@ -7,8 +8,28 @@ import argparse
 import contextlib
 import time
 import re
+import math
+import sqlite3
+import codecs
+import hashlib
+import socket
+import ssl
+import threading
+import queue
+import uuid
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from html.parser import HTMLParser
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:
+    # Windows: archive journal writes go unlocked
+    fcntl = None
+
 # Default webhook (can be overridden via command line or config file)
 SLACK_WEBHOOK = None
 EXAMPLE_JSON = {"webhook": "https://hooks.slack.com/services/YourWebHookURL"}
@@ -20,6 +41,71 @@ MAX_MESSAGE_LENGTH = 3000  # Slack's limit
 RATE_LIMIT_FILE = os.path.expanduser("~/.read_me_later_rate_limit")
 RATE_LIMIT_WINDOW = 60  # seconds
 RATE_LIMIT_MAX_REQUESTS = 10  # max requests per window
+BATCH_RATE_LIMIT_MAX_REQUESTS = 60  # max --batch posts per window, Slack allows about 1/s per webhook
+DEDUP_WINDOW = 300  # seconds an identical message is rejected after being sent
+
+# Rate limit/dedup state shared by every host pointing at the same Redis server,
+# e.g. READ_ME_LATER_STATE_URL=redis://:password@redis.internal:6379/0
+# Unset: state is kept per user in RATE_LIMIT_FILE
+STATE_BACKEND_URL = os.environ.get("READ_ME_LATER_STATE_URL")
+STATE_KEY_PREFIX = "read_me_later:{limits}"  # hash tag keeps every key in one cluster slot
+STATE_TIMEOUT = 2  # seconds
+STATE_OK = "ok"
+STATE_RATE_LIMITED = "rate_limited"
+STATE_DUPLICATE = "duplicate"
+
+# Atomic check-and-record, using the server's clock so hosts with skewed clocks agree.
+# KEYS[1]: sorted set of request times, KEYS[2] (optional): marker for this message
+# ARGV: rate window ms, max requests, dedup window ms, unique member for this request
+# Returns {status, ms until a request slot frees up}
+RATE_LIMIT_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local window = tonumber(ARGV[1])
+if KEYS[2] and redis.call('EXISTS', KEYS[2]) == 1 then
+    return {'duplicate', 0}
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {'rate_limited', tonumber(oldest[2]) + window - now}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+if KEYS[2] then
+    redis.call('SET', KEYS[2], 1, 'PX', ARGV[3])
+end
+return {'ok', 0}
+"""
+RATE_LIMIT_SCRIPT_SHA = hashlib.sha1(RATE_LIMIT_SCRIPT.encode('utf-8')).hexdigest()  # for EVALSHA
+
+# Archive of sent messages
+ARCHIVE_DB = os.path.expanduser("~/.read_me_later_archive.db")
+ARCHIVE_JOURNAL = os.path.expanduser("~/.read_me_later_archive.journal")
+ARCHIVE_FLUSH_BYTES = 64 * 1024  # flush pending entries into the db past this size
+ARCHIVE_LIST_LIMIT = 20  # default number of rows shown by search/list
+ARCHIVE_COMMANDS = ('search', 'list')
+
+# Adaptive concurrency for batch sends (--batch)
+ADAPTIVE_INITIAL_CONCURRENCY = 1
+ADAPTIVE_MAX_CONCURRENCY = 16
+ADAPTIVE_BACKOFF = 0.5  # multiply the limit by this on 429s, 5xx, errors or rising latency
+ADAPTIVE_LATENCY_WINDOW = 100  # number of recent latencies used for p99
+ADAPTIVE_LATENCY_MIN_SAMPLES = 20  # p99 is not trusted below this many samples
+ADAPTIVE_LATENCY_TOLERANCE = 2.0  # back off when p99 exceeds this multiple of the best p99 seen
+ADAPTIVE_LATENCY_MIN_RISE = 0.1  # ...and is at least this many seconds above it (ignores jitter)
+ADAPTIVE_MAX_RETRIES = 3  # per message, for 429s, 5xx and network errors
+ADAPTIVE_RETRY_DELAY = 1  # seconds, doubled on each retry
+
+# Link preview enrichment (--enrich)
+ENRICH_TIMEOUT = 3  # seconds for the whole enrichment stage
+ENRICH_MAX_BYTES = 64 * 1024  # max bytes read per page while looking for <head>
+ENRICH_MAX_URLS = 5  # max links enriched per message
+ENRICH_MAX_BATCH_URLS = 50  # max distinct links fetched for a whole --batch
+ENRICH_DESCRIPTION_LENGTH = 200
+ENRICH_CACHE_FILE = os.path.expanduser("~/.read_me_later_preview_cache.json")
+ENRICH_CACHE_TTL = 24 * 60 * 60  # seconds
+URL_PATTERN = re.compile(r'https?://[^\s<>|"]+')
 
 def validate_webhook_url(url):
     """
@@ -51,95 +137,899 @@ def validate_message_length(message):
     
     return True
 
-def check_rate_limit():
+class FileStateBackend:
     """
-    Basic rate limiting using a file-based approach
-    :return: True if within rate limit, False if rate limited
+    Rate limit/dedup state in a JSON file, shared by runs on this host only
     """
-    try:
+
+    def __init__(self, path=None):
+        self.path = path or RATE_LIMIT_FILE
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def save(self, data):
+        with open(self.path, 'w') as f:
+            json.dump(data, f)
+
+    def acquire(self, digest=None, batch=False):
+        """
+        Record a request if it is within the rate limit and not a duplicate
+        :param digest: message digest for dedup, or None to skip dedup
+        :param batch: charge the --batch budget instead of the single-message one
+        :return: (STATE_OK|STATE_RATE_LIMITED|STATE_DUPLICATE, seconds until a slot frees up)
+        """
         current_time = time.time()
-        
-        # Read existing rate limit data
-        if os.path.exists(RATE_LIMIT_FILE):
-            with open(RATE_LIMIT_FILE, 'r') as f:
-                data = json.load(f)
-                timestamps = data.get('timestamps', [])
-        else:
-            timestamps = []
-        
+        data = self.load()
+        budget = 'batch_timestamps' if batch else 'timestamps'
+        max_requests = BATCH_RATE_LIMIT_MAX_REQUESTS if batch else RATE_LIMIT_MAX_REQUESTS
+
         # Remove timestamps outside the window
-        timestamps = [ts for ts in timestamps if current_time - ts < RATE_LIMIT_WINDOW]
-        
+        timestamps = [ts for ts in data.get(budget, []) if current_time - ts < RATE_LIMIT_WINDOW]
+        recent = {d: ts for d, ts in data.get('recent', {}).items() if current_time - ts < DEDUP_WINDOW}
+
+        if digest and digest in recent:
+            return STATE_DUPLICATE, 0
+
         # Check if we're within the rate limit
-        if len(timestamps) >= RATE_LIMIT_MAX_REQUESTS:
+        if len(timestamps) >= max_requests:
             oldest_request = min(timestamps)
-            time_until_reset = RATE_LIMIT_WINDOW - (current_time - oldest_request)
-            print(f"Rate limit exceeded. Try again in {int(time_until_reset)} seconds.")
-            return False
-        
-        # Add current timestamp
+            return STATE_RATE_LIMITED, RATE_LIMIT_WINDOW - (current_time - oldest_request)
+
         timestamps.append(current_time)
-        
-        # Save updated timestamps
-        with open(RATE_LIMIT_FILE, 'w') as f:
-            json.dump({'timestamps': timestamps}, f)
-        
-        return True
-        
+        if digest:
+            recent[digest] = current_time
+        data.update({budget: timestamps, 'recent': recent})
+        self.save(data)
+        return STATE_OK, 0
+
+    def forget(self, digest):
+        """
+        Drop the dedup marker for a message so it can be sent again
+        :param digest: message digest
+        """
+        data = self.load()
+        recent = data.get('recent', {})
+        if recent.pop(digest, None) is not None:
+            self.save(data)
+
+
+class RedisError(Exception):
+    """Error reply from a Redis server"""
+
+
+class RedisStateBackend:
+    """
+    Rate limit/dedup state in Redis (or anything speaking its protocol), shared by every host.
+    Each check is one round trip, on a connection kept for the rest of the process, running
+    RATE_LIMIT_SCRIPT atomically by its SHA1.
+    """
+
+    def __init__(self, url):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ('redis', 'rediss'):
+            raise ValueError("unsupported state backend URL: {}".format(url))
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 6379
+        self.tls = parts.scheme == 'rediss'
+        self.username = urllib.parse.unquote(parts.username) if parts.username else None
+        self.password = urllib.parse.unquote(parts.password) if parts.password else None
+        self.db = parts.path.strip('/') or None
+        self.sock = None
+        self.reader = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        """
+        Open the connection used for the rest of the process
+        :return: AUTH/SELECT commands to send ahead of the first request on it
+        """
+        sock = socket.create_connection((self.host, self.port), timeout=STATE_TIMEOUT)
+        if self.tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+        self.sock, self.reader = sock, sock.makefile('rb')
+
+        setup = []
+        if self.password:
+            setup.append(('AUTH', self.username, self.password) if self.username else ('AUTH', self.password))
+        if self.db:
+            setup.append(('SELECT', self.db))
+        return setup
+
+    def close(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+            self.sock = self.reader = None
+
+    def execute(self, *commands):
+        """
+        Send commands in a single pipeline and read all the replies.
+        A kept connection the server has since closed (e.g. idle timeout) is reopened once.
+        :param commands: tuples of command arguments
+        :return: reply to the last command
+        """
+        with self.lock:
+            reused = self.sock is not None
+            try:
+                replies = self.send(commands)
+            except ConnectionError:
+                if not reused:
+                    raise
+                replies = self.send(commands)
+
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies[-1]
+
+    def send(self, commands):
+        setup = self.connect() if self.sock is None else []
+        commands = setup + list(commands)
+        try:
+            self.sock.sendall(b''.join(self.encode(command) for command in commands))
+            replies = [self.read_reply(self.reader) for _ in commands]
+        except OSError:
+            self.close()
+            raise
+
+        # A connection that failed AUTH/SELECT is no use for later commands
+        if any(isinstance(reply, RedisError) for reply in replies[:len(setup)]):
+            self.close()
+        return replies
+
+    @staticmethod
+    def encode(command):
+        parts = [str(arg).encode('utf-8') if not isinstance(arg, bytes) else arg for arg in command]
+        return b'*%d\r\n' % len(parts) + b''.join(b'$%d\r\n%s\r\n' % (len(part), part) for part in parts)
+
+    def read_reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("connection to {}:{} closed".format(self.host, self.port))
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode('utf-8')
+        if kind == b'-':
+            return RedisError(body.decode('utf-8'))
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            return reader.read(length + 2)[:-2].decode('utf-8')
+        if kind == b'*':
+            length = int(body)
+            if length < 0:
+                return None
+            return [self.read_reply(reader) for _ in range(length)]
+        raise ConnectionError("unexpected reply from {}:{}: {!r}".format(self.host, self.port, line))
+
+    def acquire(self, digest=None, batch=False):
+        """
+        Record a request if it is within the fleet-wide rate limit and not a duplicate
+        :param digest: message digest for dedup, or None to skip dedup
+        :param batch: charge the --batch budget instead of the single-message one
+        :return: (STATE_OK|STATE_RATE_LIMITED|STATE_DUPLICATE, seconds until a slot frees up)
+        """
+        keys = [STATE_KEY_PREFIX + (':batch_requests' if batch else ':requests')]
+        if digest:
+            keys.append(STATE_KEY_PREFIX + ':sent:' + digest)
+        max_requests = BATCH_RATE_LIMIT_MAX_REQUESTS if batch else RATE_LIMIT_MAX_REQUESTS
+        args = (len(keys), *keys, RATE_LIMIT_WINDOW * 1000, max_requests, DEDUP_WINDOW * 1000, uuid.uuid4().hex)
+        try:
+            status, retry_after = self.execute(('EVALSHA', RATE_LIMIT_SCRIPT_SHA, *args))
+        except RedisError as e:
+            if not str(e).startswith('NOSCRIPT'):
+                raise
+            # Script not cached on this server yet; EVAL runs it and caches it
+            status, retry_after = self.execute(('EVAL', RATE_LIMIT_SCRIPT, *args))
+        return status, retry_after / 1000
+
+    def forget(self, digest):
+        """
+        Drop the dedup marker for a message so it can be sent again
+        :param digest: message digest
+        """
+        self.execute(('DEL', STATE_KEY_PREFIX + ':sent:' + digest))
+
+
+class FallbackStateBackend:
+    """
+    Uses the shared backend until it fails, then this host's local limits for the rest of
+    the run, so an outage never means sending with no limit at all
+    """
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.failed = False
+
+    def call(self, method, *args):
+        if not self.failed:
+            try:
+                return getattr(self.primary, method)(*args)
+            except Exception as e:
+                print(f"Warning: Shared rate limiting failed ({e}), using local limits")
+                self.failed = True
+        return getattr(self.fallback, method)(*args)
+
+    def acquire(self, digest=None, batch=False):
+        return self.call('acquire', digest, batch)
+
+    def forget(self, digest):
+        return self.call('forget', digest)
+
+
+_state_backend = None  # created on first use, then kept for the rest of the process
+
+
+def get_state_backend():
+    """
+    The state backend for this process. It is created once, so a shared backend that
+    has failed stays switched to local limits for the rest of the run.
+    :return: RedisStateBackend (falling back to FileStateBackend) if READ_ME_LATER_STATE_URL
+             is set, otherwise FileStateBackend
+    """
+    global _state_backend
+    if _state_backend is None:
+        _state_backend = FileStateBackend()
+        if STATE_BACKEND_URL:
+            try:
+                _state_backend = FallbackStateBackend(RedisStateBackend(STATE_BACKEND_URL), _state_backend)
+            except ValueError as e:
+                print(f"Warning: {e}, using local limits")
+    return _state_backend
+
+
+def message_digest(message):
+    return hashlib.sha256(message.encode('utf-8')).hexdigest() if message else None
+
+
+def check_rate_limit(message=None):
+    """
+    Rate limiting and dedup against the configured state backend
+    :param message: message about to be sent; identical messages within DEDUP_WINDOW are rejected
+    :return: True if the message may be sent, False if rate limited or a duplicate
+    """
+    try:
+        status, retry_after = get_state_backend().acquire(message_digest(message))
     except Exception as e:
         # If rate limiting fails, allow the request (fail open)
         print(f"Warning: Rate limiting failed: {e}")
         return True
 
-def process_message(args):
+    if status == STATE_RATE_LIMITED:
+        print(f"Rate limit exceeded. Try again in {int(retry_after)} seconds.")
+        return False
+
+    if status == STATE_DUPLICATE:
+        print(f"Duplicate message: the same message was already sent in the last {DEDUP_WINDOW} seconds.")
+        return False
+
+    return True
+
+
+def wait_for_send_slot(backend, message=None):
     """
-    take a message and process it into slack
+    Block until the state backend grants a --batch post a slot
+    :param backend: state backend shared by the batch
+    :param message: message about to be sent for dedup, or None (e.g. for a retry)
+    :return: True once a slot is granted, False if the message is a duplicate
+    """
+    digest = message_digest(message)
+    while True:
+        try:
+            status, retry_after = backend.acquire(digest, batch=True)
+        except Exception as e:
+            # If rate limiting fails, allow the request (fail open)
+            print(f"Warning: Rate limiting failed: {e}")
+            return True
+
+        if status == STATE_OK:
+            return True
+        if status == STATE_DUPLICATE:
+            print(f"Skipping duplicate message (already sent in the last {DEDUP_WINDOW} seconds): {message}")
+            return False
+        time.sleep(max(retry_after, 0.1))
+
+
+def release_message(message, backend=None):
+    """
+    Let a message whose post failed be sent again without waiting out DEDUP_WINDOW
+    :param message: the message that failed to post
+    :param backend: state backend to use, the configured one if None
+    """
+    try:
+        (backend or get_state_backend()).forget(message_digest(message))
+    except Exception as e:
+        print(f"Warning: Unable to release message for resending: {e}")
+
+
+def lock_file(f):
+    """
+    Take an exclusive lock on an open file, released when it is closed.
+    No-op where fcntl isn't available.
+    :param f: open file object
+    """
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+
+def archive_message(message, profile, status):
+    """
+    Record a sent message in the local archive.
+    Entries are appended to a small journal file so the send path only pays for
+    one append; the journal is flushed into the SQLite index in batches.
+    :param message: the message that was posted
+    :param profile: where the webhook came from (cli, creds file path, ...)
+    :param status: HTTP status code returned by slack
+    :return: True if archived, False otherwise
+    """
+    try:
+        entry = json.dumps({'ts': time.time(), 'profile': profile, 'status': status, 'message': message})
+        with open(ARCHIVE_JOURNAL, 'a') as f:
+            lock_file(f)
+            f.write(entry + "\n")
+            f.flush()
+            pending = f.tell()
+
+        if pending >= ARCHIVE_FLUSH_BYTES:
+            flush_archive()
+
+        return True
+
+    except Exception as e:
+        # Archiving must never fail a post that already went out
+        print(f"Warning: Archiving failed: {e}")
+        return False
+
+
+def open_archive():
+    """
+    Open the archive database, creating the schema on first use
+    :return: sqlite3.Connection
+    """
+    conn = sqlite3.connect(ARCHIVE_DB, timeout=10)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS sent (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            profile TEXT,
+            status INTEGER,
+            message TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sent_ts ON sent (ts);
+        CREATE VIRTUAL TABLE IF NOT EXISTS sent_fts USING fts5(
+            message, content='sent', content_rowid='id'
+        );
+        CREATE TRIGGER IF NOT EXISTS sent_ai AFTER INSERT ON sent BEGIN
+            INSERT INTO sent_fts (rowid, message) VALUES (new.id, new.message);
+        END;
+    """)
+    return conn
+
+
+def flush_archive():
+    """
+    Move pending journal entries into the archive database in one transaction
+    :return: number of entries flushed
+    """
+    if not os.path.exists(ARCHIVE_JOURNAL):
+        return 0
+
+    with open(ARCHIVE_JOURNAL, 'r+') as f:
+        lock_file(f)
+        rows = []
+        for line in f:
+            try:
+                entry = json.loads(line)
+                rows.append((entry['ts'], entry.get('profile'), entry.get('status'), entry['message']))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # Skip a torn or malformed line rather than losing the whole batch
+                continue
+
+        if rows:
+            conn = open_archive()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO sent (ts, profile, status, message) VALUES (?, ?, ?, ?)", rows)
+            finally:
+                conn.close()
+
+        # Only drop the journal once the rows are committed
+        f.truncate(0)
+
+    return len(rows)
+
+
+def quote_search_terms(query):
+    """
+    Turn free text into an FTS5 query matching every term literally.
+    Each whitespace-separated term becomes a quoted phrase, so URLs, domains and
+    things like "c++" don't get parsed as FTS5 syntax.
+    :param query: search text
+    :return: FTS5 query string
+    """
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+
+
+def search_archive(query=None, limit=ARCHIVE_LIST_LIMIT, profile=None, raw=False):
+    """
+    Query the archive, newest first
+    :param query: search terms, or None to list everything
+    :param limit: maximum number of rows to return
+    :param profile: only return entries sent with this webhook profile
+    :param raw: pass query to FTS5 as-is instead of matching each term literally
+    :return: list of (ts, profile, status, message) tuples
+    """
+    flush_archive()
+
+    if query and not raw:
+        query = quote_search_terms(query)
+
+    sql = "SELECT sent.ts, sent.profile, sent.status, sent.message FROM sent"
+    params = []
+    where = []
+    if query:
+        sql += " JOIN sent_fts ON sent_fts.rowid = sent.id"
+        where.append("sent_fts MATCH ?")
+        params.append(query)
+    if profile:
+        where.append("sent.profile = ?")
+        params.append(profile)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY sent.ts DESC LIMIT ?"
+    params.append(limit)
+
+    conn = open_archive()
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def archive_command(args):
+    """
+    run the search/list subcommands
     :param args:
-    :return: 0 ok, 1+ errors
+    :return: 0 ok, 1 errors
     """
+    if args.command == 'search':
+        query, raw = args.query, args.raw
+    else:
+        query, raw = None, False
 
-    # Security validation: Check message length
-    if not validate_message_length(args.message):
-        print(f"Error: Message too long. Maximum length is {MAX_MESSAGE_LENGTH} characters.")
-        return 4
+    try:
+        rows = search_archive(query, limit=args.limit, profile=args.profile, raw=raw)
+    except (sqlite3.Error, OSError) as err:
+        print("unable to read archive, error: [{}]".format(err))
+        return 1
 
-    # Security validation: Check rate limit
-    if not check_rate_limit():
-        return 5
+    if not rows:
+        print("no archived messages found")
+        return 0
+
+    for ts, profile, status, message in rows:
+        when = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+        print("{}  [{}] {}  {}".format(when, profile, status, message))
+    return 0
+
+
+class HeadParser(HTMLParser):
+    """
+    Collects the title and description from an HTML <head>, stopping at <body>
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.og_title = None
+        self.description = None
+        self.done = False
+        self.in_title = False
+        self.title_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self.in_title = True
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            name = (attrs.get('name') or attrs.get('property') or '').lower()
+            content = (attrs.get('content') or '').strip()
+            if not content:
+                return
+            if name in ('description', 'og:description') and self.description is None:
+                self.description = content
+            elif name == 'og:title' and self.og_title is None:
+                self.og_title = content
+        elif tag == 'body':
+            self.done = True
 
+    def handle_endtag(self, tag):
+        if tag == 'title' and self.in_title:
+            self.in_title = False
+            self.title = ' '.join(''.join(self.title_parts).split()) or None
+        elif tag == 'head':
+            self.done = True
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+
+
+def extract_urls(message):
+    """
+    Find the distinct http(s) links in a message, in order of appearance
+    :param message:
+    :return: list of URLs (at most ENRICH_MAX_URLS)
+    """
+    urls = []
+    for url in URL_PATTERN.findall(message or ""):
+        url = url.rstrip('.,;:!?)]}\'')
+        if url not in urls:
+            urls.append(url)
+    return urls[:ENRICH_MAX_URLS]
+
+
+def fetch_preview(url, deadline):
+    """
+    Fetch the title/description of a page, streaming only until its <head> is parsed
+    :param url: page to fetch
+    :param deadline: time.monotonic() value after which to give up
+    :return: dict with title and description (either may be None), or None on failure
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+
+    headers = {
+        'User-Agent': f'read_me_later/{VERSION}',
+        'Accept': 'text/html'
+    }
+
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=remaining) as result:
+            content_type = result.headers.get('Content-Type', '')
+            if result.status_code != 200 or 'html' not in content_type:
+                return {'title': None, 'description': None}
+
+            encoding = result.encoding if 'charset' in content_type else 'utf-8'
+            try:
+                decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            except LookupError:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+            # read1 returns whatever has arrived instead of waiting for a full chunk,
+            # so a server trickling bytes can't hold the read open past the deadline
+            read = getattr(result.raw, 'read1', None) or result.raw.read
+            parser = HeadParser()
+            received = 0
+            while not parser.done and received < ENRICH_MAX_BYTES:
+                if time.monotonic() >= deadline:
+                    return None
+                chunk = read(4096, decode_content=True)
+                if not chunk:
+                    break
+                received += len(chunk)
+                parser.feed(decoder.decode(chunk))
+    except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError):
+        return None
+
+    description = parser.description
+    if description and len(description) > ENRICH_DESCRIPTION_LENGTH:
+        description = description[:ENRICH_DESCRIPTION_LENGTH - 3].rstrip() + '...'
+
+    return {'title': parser.title or parser.og_title, 'description': description}
+
+
+def load_preview_cache():
+    """
+    Load cached link previews, dropping expired entries
+    :return: dict of url -> preview
+    """
+    try:
+        if not os.path.exists(ENRICH_CACHE_FILE):
+            return {}
+        with open(ENRICH_CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+    except Exception as e:
+        print(f"Warning: Unable to read preview cache: {e}")
+        return {}
+
+    current_time = time.time()
+    return {url: entry for url, entry in cache.items()
+            if current_time - entry.get('ts', 0) < ENRICH_CACHE_TTL}
+
+
+def save_preview_cache(cache):
+    """
+    Persist link previews
+    :param cache: dict of url -> preview
+    :return: True if saved, False otherwise
+    """
+    try:
+        with open(ENRICH_CACHE_FILE, 'w') as f:
+            json.dump(cache, f)
+        return True
+    except Exception as e:
+        print(f"Warning: Unable to save preview cache: {e}")
+        return False
+
+
+def fetch_previews(urls, timeout):
+    """
+    Look up link previews in the cache, fetching the missing ones concurrently.
+    Fetches run in daemon threads, so one that overruns the deadline can't keep
+    the process alive.
+    :param urls: links to look up
+    :param timeout: budget in seconds
+    :return: (preview cache, True if every link was resolved in time)
+    """
+    deadline = time.monotonic() + timeout
+    cache = load_preview_cache()
+    misses = [url for url in urls if url not in cache]
+    if not misses:
+        return cache, True
+
+    results = queue.Queue()
+
+    def fetch(url):
+        results.put((url, fetch_preview(url, deadline)))
+
+    for url in misses:
+        threading.Thread(target=fetch, args=(url,), daemon=True).start()
+
+    resolved = 0
+    while resolved < len(misses):
+        try:
+            url, preview = results.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            break
+        resolved += 1
+        if preview is not None:
+            cache[url] = dict(preview, ts=time.time())
+
+    save_preview_cache(cache)
+    return cache, resolved == len(misses)
+
+
+def escape_mrkdwn(text):
+    """
+    Escape text for Slack mrkdwn so page content can't inject mentions or links
+    :param text:
+    :return: text with &, < and > escaped
+    """
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def enrich_message(message, timeout=ENRICH_TIMEOUT):
+    """
+    Append link titles/descriptions to a message.
+    Uncached links are fetched concurrently; if they do not all finish within
+    timeout seconds the message is returned unchanged.
+    :param message: the message to enrich
+    :param timeout: budget in seconds for the whole stage
+    :return: the enriched message, or the original one
+    """
+    urls = extract_urls(message)
+    if not urls:
+        return message
+
+    cache, complete = fetch_previews(urls, timeout)
+    if not complete:
+        print("Link enrichment timed out, sending message without previews")
+        return message
+
+    return add_previews(message, urls, cache)
+
+
+def enrich_batch(messages, timeout=ENRICH_TIMEOUT):
+    """
+    Append link titles/descriptions to every message in a batch.
+    The links of all messages are fetched together under a single deadline;
+    links that are not ready in time are left without a preview.
+    :param messages: the messages to enrich
+    :param timeout: budget in seconds for the whole batch
+    :return: list of enriched (or original) messages
+    """
+    message_urls = [extract_urls(message) for message in messages]
+    urls = list(dict.fromkeys(url for found in message_urls for url in found))[:ENRICH_MAX_BATCH_URLS]
+    if not urls:
+        return messages
+
+    cache, complete = fetch_previews(urls, timeout)
+    if not complete:
+        print("Link enrichment timed out, some messages are sent without previews")
+
+    return [add_previews(message, found, cache) for message, found in zip(messages, message_urls)]
+
+
+def add_previews(message, urls, cache):
+    """
+    Append the cached previews of a message's links
+    :param message: the message to enrich
+    :param urls: links in the message
+    :param cache: preview cache from fetch_previews
+    :return: the enriched message, or the original one if no previews fit
+    """
+    lines = []
+    for url in urls:
+        preview = cache.get(url) or {}
+        if not preview.get('title'):
+            continue
+        line = "> *{}*".format(escape_mrkdwn(preview['title']))
+        if preview.get('description'):
+            line += " - {}".format(escape_mrkdwn(preview['description']))
+        lines.append(line)
+
+    if not lines:
+        return message
+
+    enriched = message + "\n" + "\n".join(lines)
+    if not validate_message_length(enriched):
+        return message
+    return enriched
+
+
+def load_webhook(args):
+    """
+    find the webhook to post to: --creds-file, --webhook, then the default config files
+    :param args:
+    :return: (webhook or None, profile name recorded in the archive)
+    """
     if args.creds_file:
         creds = load_json_file(args.creds_file)
+        profile = args.creds_file
     elif args.webhook:
         creds = args.webhook
+        profile = "cli"
     else:
         # Try to load from default location ~/.read_me_later.json
         default_config = os.path.expanduser("~/.read_me_later.json")
         if os.path.exists(default_config):
             print(f"Loading webhook from {default_config}")
             creds = load_json_file(default_config)
+            profile = default_config
         else:
             # Also try the current directory for Docker mounts
             current_dir_config = "/app/.read_me_later.json"
             if os.path.exists(current_dir_config):
                 print(f"Loading webhook from {current_dir_config}")
                 creds = load_json_file(current_dir_config)
+                profile = current_dir_config
             else:
                 creds = SLACK_WEBHOOK
+                profile = "default"
+
+    return creds, profile
+
+
+def process_message(args):
+    """
+    take a message and process it into slack
+    :param args:
+    :return: 0 ok, 1+ errors
+    """
+
+    # Security validation: Check message length
+    if not validate_message_length(args.message):
+        print(f"Error: Message too long. Maximum length is {MAX_MESSAGE_LENGTH} characters.")
+        return 4
+
+    # Security validation: Check rate limit and duplicates
+    if not check_rate_limit(args.message):
+        return 5
+
+    creds, profile = load_webhook(args)
 
     if not creds:
         print("unable to find slack credentials, post will fail")
         print("Please provide webhook via --webhook, --creds-file, or create ~/.read_me_later.json")
+        release_message(args.message)
         return 2
 
     # Security validation: Validate webhook URL
     if not validate_webhook_url(creds):
         print("Error: Invalid Slack webhook URL. Please check your configuration.")
+        release_message(args.message)
         return 6
 
-    if not call_slack(args.message, creds):
+    message = args.message
+    if args.enrich:
+        message = enrich_message(message)
+
+    status = call_slack(message, creds)
+    if not is_delivered(status):
+        if status:
+            print("Slack did not accept the message. Status code: {}".format(status))
+        release_message(args.message)
         return 3
-    else:
-        return 0
+
+    archive_message(message, profile, status)
+    return 0
+
+
+def load_batch_file(filename):
+    """
+    read messages for --batch, one per line; "-" reads stdin
+    :param filename:
+    :return: list of messages, or None if the file can't be read
+    """
+    try:
+        if filename == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(filename) as file_open:
+                lines = file_open.read().splitlines()
+    except (IOError, OSError, UnicodeDecodeError) as err:
+        print("unable to read batch file {}. {}".format(filename, err))
+        return None
+
+    return [line for line in lines if line.strip()]
+
+
+def process_batch(args):
+    """
+    post every message in a batch file, paced by an AdaptiveLimiter
+    :param args:
+    :return: 0 ok, 1+ errors
+    """
+    messages = load_batch_file(args.batch)
+    if not messages:
+        print("no messages to send")
+        return 1
+
+    # Security validation: Check message length before anything is sent
+    for number, message in enumerate(messages, 1):
+        if not validate_message_length(message):
+            print(f"Error: Message {number} too long. Maximum length is {MAX_MESSAGE_LENGTH} characters.")
+            return 4
+
+    creds, profile = load_webhook(args)
+
+    if not creds:
+        print("unable to find slack credentials, post will fail")
+        print("Please provide webhook via --webhook, --creds-file, or create ~/.read_me_later.json")
+        return 2
+
+    # Security validation: Validate webhook URL
+    if not validate_webhook_url(creds):
+        print("Error: Invalid Slack webhook URL. Please check your configuration.")
+        return 6
+
+    if args.enrich:
+        messages = enrich_batch(messages)
+
+    limiter = AdaptiveLimiter()
+    state = get_state_backend()
+    statuses = send_batch(messages, creds, limiter, state)
+
+    delivered = 0
+    duplicates = 0
+    for message, status in zip(messages, statuses):
+        if status == STATE_DUPLICATE:
+            duplicates += 1
+        elif is_delivered(status):
+            delivered += 1
+            archive_message(message, profile, status)
+        else:
+            release_message(message, state)
+
+    stats = limiter.stats()
+    p99 = "{:.3f}s".format(stats['p99']) if stats['p99'] is not None else "n/a"
+    print("Sent {}/{} messages ({} duplicates skipped). Concurrency limit: {}, errors: {}, p99 latency: {}".format(
+        delivered, len(messages), duplicates, stats['limit'], stats['errors'], p99))
+
+    if delivered + duplicates != len(messages):
+        return 3
+    return 0
 
 
 def call_slack(msg, slack_url):
@@ -171,6 +1061,175 @@ def call_slack(msg, slack_url):
     return result.status_code
 
 
+def is_delivered(status):
+    """
+    Whether a call_slack() result means the message was posted
+    :param status: HTTP status code, or None for timeouts/network errors
+    :return: True for 2xx responses
+    """
+    return status is not None and 200 <= status < 300
+
+
+def is_retryable(status):
+    """
+    Whether a call_slack() result means slack is overloaded or unreachable
+    :param status: HTTP status code, or None for timeouts/network errors
+    :return: True for 429, 5xx and network errors
+    """
+    return status is None or status == 429 or status >= 500
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter driven by observed webhook latency.
+    The in-flight limit grows by roughly one per round trip while responses are
+    healthy, and is cut by ADAPTIVE_BACKOFF on 429s, 5xx, network errors or when
+    the recent p99 latency rises well above the best p99 seen so far.
+    """
+
+    def __init__(self, initial=ADAPTIVE_INITIAL_CONCURRENCY, minimum=1, maximum=ADAPTIVE_MAX_CONCURRENCY):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.inflight = 0
+        self.successes = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=ADAPTIVE_LATENCY_WINDOW)
+        self.best_p99 = None
+        self.last_backoff = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Block until a request may be sent
+        :return: start time to hand back to release()
+        """
+        with self.condition:
+            while self.inflight >= int(self.limit):
+                self.condition.wait()
+            self.inflight += 1
+        return time.monotonic()
+
+    def release(self, started, status):
+        """
+        Record the outcome of a request and adjust the limit
+        :param started: value returned by acquire()
+        :param status: HTTP status code, or None for timeouts/network errors
+        """
+        with self.condition:
+            self.inflight -= 1
+
+            if is_retryable(status):
+                self.errors += 1
+                self.backoff(started)
+            else:
+                self.successes += 1
+                self.latencies.append(time.monotonic() - started)
+                p99 = self.p99()
+                if self.latency_rising(p99):
+                    self.backoff(started)
+                    # Judge the new limit on fresh samples only
+                    self.latencies.clear()
+                else:
+                    if p99 is not None:
+                        self.best_p99 = p99 if self.best_p99 is None else min(self.best_p99, p99)
+                    self.limit = min(self.limit + 1 / self.limit, self.maximum)
+
+            self.condition.notify_all()
+
+    def backoff(self, started):
+        # Requests already in flight when we backed off saw the old limit; don't cut twice for them
+        if started < self.last_backoff:
+            return
+        self.limit = max(self.limit * ADAPTIVE_BACKOFF, self.minimum)
+        self.last_backoff = time.monotonic()
+
+    def latency_rising(self, p99):
+        if p99 is None or self.best_p99 is None:
+            return False
+        return (p99 > self.best_p99 * ADAPTIVE_LATENCY_TOLERANCE
+                and p99 - self.best_p99 > ADAPTIVE_LATENCY_MIN_RISE)
+
+    def p99(self):
+        if len(self.latencies) < ADAPTIVE_LATENCY_MIN_SAMPLES:
+            return None
+        # Nearest-rank percentile
+        ordered = sorted(self.latencies)
+        return ordered[math.ceil(0.99 * len(ordered)) - 1]
+
+    def stats(self):
+        """
+        :return: dict with the current limit, in-flight count, outcome counters and p99 latency
+        """
+        with self.condition:
+            return {
+                'limit': int(self.limit),
+                'inflight': self.inflight,
+                'successes': self.successes,
+                'errors': self.errors,
+                'p99': self.p99(),
+            }
+
+
+def send_batch(messages, slack_url, limiter=None, state=None):
+    """
+    Post many messages concurrently, with in-flight requests capped by an AdaptiveLimiter.
+    Every post (retries included) first takes a slot from the BATCH_RATE_LIMIT_MAX_REQUESTS
+    budget, waiting for one if needed. Messages already sent within DEDUP_WINDOW are skipped.
+    429s, 5xx and network errors are retried up to ADAPTIVE_MAX_RETRIES times.
+    :param messages: list of messages
+    :param slack_url: webhook to post to
+    :param limiter: AdaptiveLimiter to use, a fresh one if None
+    :param state: rate limit/dedup state backend, the configured one if None
+    :return: list of final status codes (None for network errors, STATE_DUPLICATE for
+             skipped duplicates), in message order
+    """
+    if limiter is None:
+        limiter = AdaptiveLimiter()
+    if state is None:
+        state = get_state_backend()
+
+    statuses = [None] * len(messages)
+    # (message index, attempt, monotonic time it may be sent from)
+    pending = deque((index, 0, 0) for index in range(len(messages)))
+
+    def send_one(index, started):
+        status = call_slack(messages[index], slack_url)
+        limiter.release(started, status)
+        return status
+
+    # Retry backoff is waited out here, so workers only ever spend time on requests
+    outstanding = {}
+    with ThreadPoolExecutor(max_workers=limiter.maximum) as executor:
+        while pending or outstanding:
+            now = time.monotonic()
+            ready = next((entry for entry in pending if entry[2] <= now), None)
+            if ready:
+                pending.remove(ready)
+                index, attempt, _ = ready
+                # Only the first attempt is checked for duplicates; retries just need a slot
+                if not wait_for_send_slot(state, messages[index] if attempt == 0 else None):
+                    statuses[index] = STATE_DUPLICATE
+                    continue
+                started = limiter.acquire()
+                outstanding[executor.submit(send_one, index, started)] = ready
+            else:
+                timeout = min(entry[2] for entry in pending) - now if pending else None
+                if outstanding:
+                    wait(outstanding, timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(timeout)
+
+            for future in [future for future in outstanding if future.done()]:
+                index, attempt, _ = outstanding.pop(future)
+                status = statuses[index] = future.result()
+                if is_retryable(status) and attempt < ADAPTIVE_MAX_RETRIES:
+                    not_before = time.monotonic() + ADAPTIVE_RETRY_DELAY * 2 ** attempt
+                    pending.append((index, attempt + 1, not_before))
+
+    return statuses
+
+
 def load_json_file(filename):
     """
     consumes a json formated file extracts the  value of "webhook": VALUE
@@ -207,20 +1266,61 @@ def cli_parser(args):
     parser.add_argument('-f', '--creds-file', dest="creds_file", default=None,
                         help="You can pass slack creds in as a  JSON file [OPTIONAL] Exmaple JSON: {}".format(
                             EXAMPLE_JSON))
-    parser.add_argument('-m', '--message', dest="message", default=None, required=True,
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('-m', '--message', dest="message", default=None,
                         help="the string you wish to post to slack")
+    source.add_argument('-b', '--batch', dest="batch", default=None,
+                        help='File with one message per line to post concurrently, "-" for stdin [OPTIONAL] '
+                             'Concurrency adapts to slack\'s response times and errors')
     parser.add_argument('-w', '--webhook', dest='webhook', default=None, help='Pass Slack webhook in directly [OPTIONAL] Exmaple: "https://yourwebhookhere.com"')
+    parser.add_argument('-e', '--enrich', dest='enrich', action='store_true', default=False,
+                        help='Append titles/descriptions of links in the message [OPTIONAL] '
+                             'Gives up after {} seconds and posts the message as-is'.format(ENRICH_TIMEOUT))
     args = parser.parse_args()
 
     return args
 
 
+def archive_parser(args):
+    """
+    command line parser for the archive subcommands (search, list)
+    :param args: arguments following the script name
+    :return: args.Namespace
+    """
+
+    parser = argparse.ArgumentParser(
+        prog=SCRIPT_NAME,
+        description='{}, version {}: search messages previously posted to slack'.format(SCRIPT_NAME, VERSION))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search = subparsers.add_parser('search', help='full-text search of archived messages')
+    search.add_argument('query', help='search terms; messages containing all of them are shown')
+    search.add_argument('--raw', dest='raw', action='store_true', default=False,
+                        help='treat the query as SQLite FTS5 syntax, e.g. "python AND (asyncio OR trio)"')
+
+    listing = subparsers.add_parser('list', help='list the most recently archived messages')
+
+    for sub in (search, listing):
+        sub.add_argument('-n', '--limit', dest='limit', type=int, default=ARCHIVE_LIST_LIMIT,
+                         help='maximum number of messages to show [default: {}]'.format(ARCHIVE_LIST_LIMIT))
+        sub.add_argument('-p', '--profile', dest='profile', default=None,
+                         help='only show messages sent with this webhook profile (cli, creds file path, ...)')
+
+    return parser.parse_args(args)
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ARCHIVE_COMMANDS:
+        return archive_command(archive_parser(sys.argv[1:]))
+
     args = cli_parser(sys.argv[:1])
     if not args:
         print("failed to parse arguments")
         return 1
 
+    if args.batch:
+        return process_batch(args)
+
     return process_message(args)
 
 
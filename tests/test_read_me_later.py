@@ -11,6 +11,13 @@ from unittest.mock import patch, MagicMock
 import sys
 import io
 import time
+import threading
+import hashlib
+import socket
+import shutil
+import subprocess
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Add the current directory to the path so we can import the module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -34,9 +41,33 @@ class TestReadMeLater(unittest.TestCase):
         with open(self.test_creds_file, 'w') as f:
             json.dump({"webhook": self.test_webhook}, f)
 
+        # Keep the message archive out of the real home directory
+        self.archive_patcher = patch.multiple(
+            read_me_later,
+            ARCHIVE_DB=os.path.join(self.temp_dir, "archive.db"),
+            ARCHIVE_JOURNAL=os.path.join(self.temp_dir, "archive.journal"),
+            ENRICH_CACHE_FILE=os.path.join(self.temp_dir, "preview_cache.json"),
+        )
+        self.archive_patcher.start()
+
+        # Rate limit state for batch tests, so they never wait on the real budget
+        self.rate_limit_file = os.path.join(self.temp_dir, "rate_limit")
+        self.state = read_me_later.FileStateBackend(self.rate_limit_file)
+
+        # Each test builds its own per-process state backend
+        self.state_backend_patcher = patch('read_me_later._state_backend', None)
+        self.state_backend_patcher.start()
+
     def tearDown(self):
         """Clean up test fixtures"""
+        self.archive_patcher.stop()
+        self.state_backend_patcher.stop()
+
         # Remove temporary files
+        for name in ("archive.db", "archive.journal", "preview_cache.json", "rate_limit"):
+            path = os.path.join(self.temp_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
         if os.path.exists(self.test_creds_file):
             os.remove(self.test_creds_file)
         if os.path.exists(self.temp_dir):
@@ -521,6 +552,1070 @@ class TestReadMeLater(unittest.TestCase):
         mock_rate_limit.assert_called_once()
         mock_call_slack.assert_called_once_with("Valid message", self.test_webhook)
 
+    # Archive tests
+    @patch('read_me_later.call_slack')
+    def test_process_message_archives_sent_message(self, mock_call_slack):
+        """Test that a delivered message is recorded in the archive"""
+        mock_call_slack.return_value = 200
+
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.message = "Read later: https://example.com/sqlite-fts5"
+        args.enrich = False
+
+        self.assertEqual(read_me_later.process_message(args), 0)
+
+        rows = read_me_later.search_archive("sqlite")
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][1:], ("cli", 200, args.message))
+
+    @patch('read_me_later.call_slack')
+    def test_process_message_failed_send_not_archived(self, mock_call_slack):
+        """Test that a failed post is not archived"""
+        mock_call_slack.return_value = None
+
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.message = self.test_message
+
+        self.assertEqual(read_me_later.process_message(args), 3)
+        self.assertEqual(read_me_later.search_archive(), [])
+
+    @patch('read_me_later.call_slack')
+    def test_process_message_error_status_not_archived(self, mock_call_slack):
+        """Test that a non-2xx response is a failed send and is not archived"""
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.enrich = False
+
+        for status in (404, 429, 500):
+            with self.subTest(status=status):
+                mock_call_slack.return_value = status
+                args.message = "message {}".format(status)
+                self.assertEqual(read_me_later.process_message(args), 3)
+
+        self.assertEqual(read_me_later.search_archive(), [])
+
+    def test_is_delivered(self):
+        """Test which call_slack results count as delivered"""
+        for status in (200, 201, 204):
+            self.assertTrue(read_me_later.is_delivered(status))
+        for status in (None, 199, 301, 404, 429, 500):
+            self.assertFalse(read_me_later.is_delivered(status))
+
+    def test_archive_message_is_batched(self):
+        """Test that entries stay in the journal until the flush threshold"""
+        read_me_later.archive_message("first article", "cli", 200)
+        self.assertFalse(os.path.exists(read_me_later.ARCHIVE_DB))
+
+        with patch('read_me_later.ARCHIVE_FLUSH_BYTES', 1):
+            read_me_later.archive_message("second article", "cli", 200)
+
+        self.assertTrue(os.path.exists(read_me_later.ARCHIVE_DB))
+        self.assertEqual(os.path.getsize(read_me_later.ARCHIVE_JOURNAL), 0)
+        self.assertEqual(len(read_me_later.search_archive("article")), 2)
+
+    def test_flush_archive_skips_malformed_lines(self):
+        """Test that bad journal lines are skipped instead of breaking search"""
+        read_me_later.archive_message("good entry", "cli", 200)
+        with open(read_me_later.ARCHIVE_JOURNAL, 'a') as f:
+            f.write('{"ts": 1\n')
+            f.write('{"profile": "cli"}\n')
+            f.write('["not", "an", "object"]\n')
+            f.write('42\n')
+
+        self.assertEqual(read_me_later.flush_archive(), 1)
+        self.assertEqual([r[3] for r in read_me_later.search_archive()], ["good entry"])
+
+    @patch('read_me_later.fcntl', None)
+    def test_archive_without_fcntl(self):
+        """Test archiving works where file locking isn't available"""
+        self.assertTrue(read_me_later.archive_message("no locking here", "cli", 200))
+        self.assertEqual(len(read_me_later.search_archive("locking")), 1)
+
+    @patch('builtins.open')
+    def test_archive_message_failure(self, mock_open):
+        """Test that archiving fails open"""
+        mock_open.side_effect = Exception("File system error")
+        self.assertFalse(read_me_later.archive_message(self.test_message, "cli", 200))
+
+    def test_search_archive_filters(self):
+        """Test full-text search, profile filtering, ordering and limits"""
+        for i, (message, profile) in enumerate([
+                ("python packaging guide", "cli"),
+                ("rust async book", "cli"),
+                ("python asyncio deep dive", "/app/creds.json")]):
+            with patch('read_me_later.time.time', return_value=1000 + i):
+                read_me_later.archive_message(message, profile, 200)
+
+        rows = read_me_later.search_archive("python")
+        self.assertEqual([r[3] for r in rows], ["python asyncio deep dive", "python packaging guide"])
+
+        rows = read_me_later.search_archive("python", profile="cli")
+        self.assertEqual([r[3] for r in rows], ["python packaging guide"])
+
+        rows = read_me_later.search_archive(limit=2)
+        self.assertEqual([r[3] for r in rows], ["python asyncio deep dive", "rust async book"])
+
+    def test_archive_command_search_and_list(self):
+        """Test the search and list subcommands"""
+        read_me_later.archive_message("https://example.com/fts5", "cli", 200)
+
+        with patch('sys.stdout', new_callable=io.StringIO) as out:
+            args = read_me_later.archive_parser(['search', 'fts5'])
+            self.assertEqual(read_me_later.archive_command(args), 0)
+        self.assertIn("[cli] 200  https://example.com/fts5", out.getvalue())
+
+        with patch('sys.stdout', new_callable=io.StringIO) as out:
+            args = read_me_later.archive_parser(['list', '--profile', 'other'])
+            self.assertEqual(read_me_later.archive_command(args), 0)
+        self.assertIn("no archived messages found", out.getvalue())
+
+    def test_archive_command_bad_query(self):
+        """Test that an invalid FTS5 query is reported, not raised"""
+        read_me_later.archive_message(self.test_message, "cli", 200)
+        args = read_me_later.archive_parser(['search', '--raw', 'AND ('])
+        self.assertEqual(read_me_later.archive_command(args), 1)
+
+    def test_search_archive_urls_and_symbols(self):
+        """Test that URLs, domains and punctuation are searched literally"""
+        read_me_later.archive_message("Read https://example.com/sqlite-fts5 later", "cli", 200)
+        read_me_later.archive_message("Modern c++ talk", "cli", 200)
+        read_me_later.archive_message('The "quoted" title', "cli", 200)
+
+        for query, expected in [
+                ("https://example.com/sqlite-fts5", "Read https://example.com/sqlite-fts5 later"),
+                ("example.com", "Read https://example.com/sqlite-fts5 later"),
+                ("sqlite-fts5", "Read https://example.com/sqlite-fts5 later"),
+                ("c++", "Modern c++ talk"),
+                ('"quoted', 'The "quoted" title'),
+                ("AND (", None)]:
+            with self.subTest(query=query):
+                rows = read_me_later.search_archive(query)
+                self.assertEqual([r[3] for r in rows], [expected] if expected else [])
+
+    def test_search_archive_raw_query(self):
+        """Test that --raw passes FTS5 syntax through"""
+        read_me_later.archive_message("python asyncio", "cli", 200)
+        read_me_later.archive_message("python packaging", "cli", 200)
+
+        rows = read_me_later.search_archive("python NOT asyncio", raw=True)
+        self.assertEqual([r[3] for r in rows], ["python packaging"])
+        self.assertEqual(read_me_later.archive_parser(['search', '--raw', 'x']).raw, True)
+
+    @patch('read_me_later.archive_command')
+    def test_main_dispatches_archive_commands(self, mock_archive_command):
+        """Test that main routes search/list to the archive subcommands"""
+        mock_archive_command.return_value = 0
+
+        with patch('sys.argv', ['read_me_later.py', 'list', '-n', '5']):
+            self.assertEqual(read_me_later.main(), 0)
+
+        args = mock_archive_command.call_args[0][0]
+        self.assertEqual(args.command, 'list')
+        self.assertEqual(args.limit, 5)
+
+    # Enrichment tests
+    def test_extract_urls(self):
+        """Test URL extraction from messages"""
+        message = "Read https://a.example/x, then (http://b.example/y) and https://a.example/x again"
+        self.assertEqual(read_me_later.extract_urls(message), ["https://a.example/x", "http://b.example/y"])
+        self.assertEqual(read_me_later.extract_urls("no links here"), [])
+
+    @patch('read_me_later.enrich_message')
+    @patch('read_me_later.call_slack')
+    def test_process_message_with_enrich(self, mock_call_slack, mock_enrich):
+        """Test that --enrich sends the enriched message"""
+        mock_call_slack.return_value = 200
+        mock_enrich.return_value = "enriched"
+
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.message = self.test_message
+        args.enrich = True
+
+        self.assertEqual(read_me_later.process_message(args), 0)
+        mock_enrich.assert_called_once_with(self.test_message)
+        mock_call_slack.assert_called_once_with("enriched", self.test_webhook)
+
+    def test_cli_parser_enrich(self):
+        """Test CLI parser enrich flag"""
+        with patch('sys.argv', ['read_me_later.py', '--message', self.test_message, '--enrich']):
+            args = read_me_later.cli_parser([])
+        self.assertTrue(args.enrich)
+
+    # Batch / adaptive limiter tests
+    def test_adaptive_limiter_grows_when_healthy(self):
+        """Test additive increase while responses are healthy"""
+        limiter = read_me_later.AdaptiveLimiter()
+        for _ in range(10):
+            limiter.release(limiter.acquire(), 200)
+
+        stats = limiter.stats()
+        self.assertGreater(stats['limit'], 1)
+        self.assertEqual(stats['successes'], 10)
+        self.assertEqual(stats['inflight'], 0)
+
+    def test_adaptive_limiter_caps_at_maximum(self):
+        """Test the limit never exceeds the maximum"""
+        limiter = read_me_later.AdaptiveLimiter(maximum=3)
+        for _ in range(50):
+            limiter.release(limiter.acquire(), 200)
+        self.assertEqual(limiter.stats()['limit'], 3)
+
+    def test_adaptive_limiter_backs_off_on_errors(self):
+        """Test multiplicative decrease on 429, 5xx and network errors"""
+        for status in (429, 503, None):
+            with self.subTest(status=status):
+                limiter = read_me_later.AdaptiveLimiter(initial=8)
+                limiter.release(limiter.acquire(), status)
+                stats = limiter.stats()
+                self.assertEqual(stats['limit'], 4)
+                self.assertEqual(stats['errors'], 1)
+
+    def test_adaptive_limiter_backs_off_once_per_round(self):
+        """Test requests already in flight don't cut the limit again"""
+        limiter = read_me_later.AdaptiveLimiter(initial=8)
+        started = [limiter.acquire() for _ in range(4)]
+        for start in started:
+            limiter.release(start, 429)
+        self.assertEqual(limiter.stats()['limit'], 4)
+
+        limiter.release(limiter.acquire(), 429)
+        self.assertEqual(limiter.stats()['limit'], 2)
+
+    def test_adaptive_limiter_never_below_minimum(self):
+        """Test the limit never drops below the minimum"""
+        limiter = read_me_later.AdaptiveLimiter()
+        for _ in range(5):
+            limiter.release(limiter.acquire(), 429)
+        self.assertEqual(limiter.stats()['limit'], 1)
+
+    @patch('read_me_later.time.monotonic')
+    def test_adaptive_limiter_backs_off_on_rising_p99(self, mock_monotonic):
+        """Test that a latency spike cuts the limit"""
+        clock = [0.0]
+        mock_monotonic.side_effect = lambda: clock[0]
+
+        limiter = read_me_later.AdaptiveLimiter(initial=8)
+        for _ in range(read_me_later.ADAPTIVE_LATENCY_MIN_SAMPLES):
+            started = limiter.acquire()
+            clock[0] += 0.1
+            limiter.release(started, 200)
+        healthy_limit = limiter.stats()['limit']
+        self.assertAlmostEqual(limiter.stats()['p99'], 0.1)
+
+        started = limiter.acquire()
+        clock[0] += 5
+        limiter.release(started, 200)
+        self.assertEqual(limiter.stats()['limit'], healthy_limit // 2)
+
+    @patch('read_me_later.ADAPTIVE_RETRY_DELAY', 0)
+    @patch('read_me_later.call_slack')
+    def test_send_batch_retries_and_respects_limit(self, mock_call_slack):
+        """Test batch sends retry 429s and never exceed the concurrency limit"""
+        limiter = read_me_later.AdaptiveLimiter(maximum=4)
+        lock = threading.Lock()
+        seen = {'max_inflight': 0, 'calls': {}}
+
+        def fake_call_slack(msg, url):
+            with lock:
+                seen['max_inflight'] = max(seen['max_inflight'], limiter.inflight)
+                seen['calls'][msg] = seen['calls'].get(msg, 0) + 1
+                first = seen['calls'][msg] == 1
+            time.sleep(0.001)
+            return 429 if msg == "message 3" and first else 200
+
+        mock_call_slack.side_effect = fake_call_slack
+        messages = ["message {}".format(i) for i in range(30)]
+
+        statuses = read_me_later.send_batch(messages, self.test_webhook, limiter, self.state)
+
+        self.assertEqual(statuses, [200] * 30)
+        self.assertEqual(seen['calls']["message 3"], 2)
+        self.assertLessEqual(seen['max_inflight'], 4)
+        self.assertEqual(limiter.stats()['inflight'], 0)
+
+    @patch('read_me_later.ADAPTIVE_RETRY_DELAY', 0)
+    @patch('read_me_later.call_slack')
+    def test_send_batch_gives_up_after_retries(self, mock_call_slack):
+        """Test a message that keeps failing is retried a bounded number of times"""
+        mock_call_slack.return_value = 503
+        statuses = read_me_later.send_batch(["only"], self.test_webhook, state=self.state)
+        self.assertEqual(statuses, [503])
+        self.assertEqual(mock_call_slack.call_count, read_me_later.ADAPTIVE_MAX_RETRIES + 1)
+
+    @patch('read_me_later.ADAPTIVE_RETRY_DELAY', 0.3)
+    @patch('read_me_later.call_slack')
+    def test_send_batch_retry_backoff_does_not_hold_a_worker(self, mock_call_slack):
+        """Test the retry backoff is waited out by the dispatcher, not a worker"""
+        calls = []
+
+        def fake_call_slack(msg, url):
+            calls.append((msg, time.monotonic()))
+            return 503 if len(calls) == 1 else 200
+
+        mock_call_slack.side_effect = fake_call_slack
+        limiter = read_me_later.AdaptiveLimiter(maximum=1)
+
+        statuses = read_me_later.send_batch(["first", "second"], self.test_webhook, limiter, self.state)
+
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual([msg for msg, _ in calls], ["first", "second", "first"])
+        # "second" goes out straight away while "first" waits for its retry
+        self.assertLess(calls[1][1] - calls[0][1], 0.2)
+        self.assertGreaterEqual(calls[2][1] - calls[0][1], 0.3)
+
+    @patch('read_me_later.call_slack')
+    def test_send_batch_charges_batch_budget(self, mock_call_slack):
+        """Test every batch post takes a slot from the batch budget, not the single-message one"""
+        mock_call_slack.return_value = 200
+        messages = ["message {}".format(i) for i in range(read_me_later.RATE_LIMIT_MAX_REQUESTS * 2)]
+
+        statuses = read_me_later.send_batch(messages, self.test_webhook, state=self.state)
+
+        self.assertEqual(statuses, [200] * len(messages))
+        data = self.state.load()
+        self.assertEqual(len(data['batch_timestamps']), len(messages))
+        self.assertNotIn('timestamps', data)
+
+    @patch('read_me_later.time.sleep')
+    @patch('read_me_later.call_slack')
+    def test_send_batch_waits_for_a_slot(self, mock_call_slack, mock_sleep):
+        """Test a batch waits for the state backend to free a slot instead of failing"""
+        mock_call_slack.return_value = 200
+        state = MagicMock()
+        state.acquire.side_effect = [
+            (read_me_later.STATE_OK, 0),
+            (read_me_later.STATE_RATE_LIMITED, 7.5),
+            (read_me_later.STATE_OK, 0),
+        ]
+
+        statuses = read_me_later.send_batch(["first", "second"], self.test_webhook, state=state)
+
+        self.assertEqual(statuses, [200, 200])
+        mock_sleep.assert_called_once_with(7.5)
+        state.acquire.assert_called_with(read_me_later.message_digest("second"), batch=True)
+
+    @patch('read_me_later.call_slack')
+    def test_send_batch_skips_duplicates(self, mock_call_slack):
+        """Test a batch skips messages sent recently, and checks retries for a slot only"""
+        mock_call_slack.side_effect = [503, 200, 200]
+        self.assertEqual(self.state.acquire(read_me_later.message_digest("already sent"))[0],
+                         read_me_later.STATE_OK)
+
+        with patch('read_me_later.ADAPTIVE_RETRY_DELAY', 0), patch('sys.stdout', new_callable=io.StringIO) as out:
+            statuses = read_me_later.send_batch(["retried", "already sent", "repeated", "repeated"],
+                                                self.test_webhook, read_me_later.AdaptiveLimiter(maximum=1),
+                                                self.state)
+
+        self.assertEqual(statuses, [200, read_me_later.STATE_DUPLICATE, 200, read_me_later.STATE_DUPLICATE])
+        self.assertEqual([call.args[0] for call in mock_call_slack.call_args_list],
+                         ["retried", "repeated", "retried"])
+        self.assertEqual(out.getvalue().count("Skipping duplicate message"), 2)
+
+    @patch('read_me_later.call_slack')
+    def test_process_batch_duplicates_and_release(self, mock_call_slack):
+        """Test a batch reports skipped duplicates and releases messages that failed"""
+        mock_call_slack.side_effect = lambda msg, url: 404 if msg == "bad" else 200
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.enrich = False
+        args.batch = "-"
+
+        with patch('sys.stdin', io.StringIO("good\nbad\n")), \
+                patch('read_me_later.RATE_LIMIT_FILE', self.rate_limit_file):
+            with patch('sys.stdout', new_callable=io.StringIO):
+                self.assertEqual(read_me_later.process_batch(args), 3)
+
+        # "good" is now a duplicate, "bad" was released and goes out again
+        with patch('sys.stdin', io.StringIO("good\nbad\n")), \
+                patch('read_me_later.RATE_LIMIT_FILE', self.rate_limit_file):
+            mock_call_slack.side_effect = None
+            mock_call_slack.return_value = 200
+            with patch('sys.stdout', new_callable=io.StringIO) as out:
+                self.assertEqual(read_me_later.process_batch(args), 0)
+        self.assertIn("Sent 1/2 messages (1 duplicates skipped)", out.getvalue())
+        self.assertEqual(mock_call_slack.call_args.args[0], "bad")
+
+    @patch('read_me_later.call_slack')
+    def test_main_batch(self, mock_call_slack):
+        """Test --batch posts and archives every line of the file"""
+        mock_call_slack.return_value = 200
+        batch_file = os.path.join(self.temp_dir, "batch.txt")
+        with open(batch_file, 'w') as f:
+            f.write("first\n\nsecond\n")
+
+        try:
+            argv = ['read_me_later.py', '--webhook', self.test_webhook, '--batch', batch_file]
+            with patch('sys.argv', argv), patch('read_me_later.RATE_LIMIT_FILE', self.rate_limit_file), \
+                    patch('sys.stdout', new_callable=io.StringIO) as out:
+                self.assertEqual(read_me_later.main(), 0)
+        finally:
+            os.remove(batch_file)
+
+        self.assertEqual(mock_call_slack.call_count, 2)
+        self.assertIn("Sent 2/2 messages", out.getvalue())
+        self.assertEqual(len(read_me_later.search_archive()), 2)
+
+    @patch('read_me_later.call_slack')
+    def test_process_batch_any_2xx_delivered(self, mock_call_slack):
+        """Test that any 2xx response counts as delivered in a batch"""
+        mock_call_slack.side_effect = lambda msg, url: 204 if msg == "no content" else 200
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.enrich = False
+        args.batch = "-"
+
+        with patch('sys.stdin', io.StringIO("ok\nno content\n")), \
+                patch('read_me_later.RATE_LIMIT_FILE', self.rate_limit_file):
+            self.assertEqual(read_me_later.process_batch(args), 0)
+        self.assertEqual(len(read_me_later.search_archive()), 2)
+
+    @patch('read_me_later.enrich_message')
+    @patch('read_me_later.enrich_batch')
+    @patch('read_me_later.call_slack')
+    def test_process_batch_with_enrich(self, mock_call_slack, mock_enrich_batch, mock_enrich_message):
+        """Test that --enrich enriches the whole batch in one pass"""
+        mock_call_slack.return_value = 200
+        mock_enrich_batch.return_value = ["first enriched", "second enriched"]
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.enrich = True
+        args.batch = "-"
+
+        with patch('sys.stdin', io.StringIO("first\nsecond\n")), \
+                patch('read_me_later.RATE_LIMIT_FILE', self.rate_limit_file):
+            self.assertEqual(read_me_later.process_batch(args), 0)
+        mock_enrich_batch.assert_called_once_with(["first", "second"])
+        mock_enrich_message.assert_not_called()
+        sent = sorted(call.args[0] for call in mock_call_slack.call_args_list)
+        self.assertEqual(sent, ["first enriched", "second enriched"])
+
+    @patch('read_me_later.call_slack')
+    def test_process_batch_too_long(self, mock_call_slack):
+        """Test a batch with an oversized line is rejected before sending"""
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.enrich = False
+        args.batch = "-"
+
+        with patch('sys.stdin', io.StringIO("ok\n" + "A" * (read_me_later.MAX_MESSAGE_LENGTH + 1))):
+            self.assertEqual(read_me_later.process_batch(args), 4)
+        mock_call_slack.assert_not_called()
+
+    @patch('read_me_later.call_slack')
+    def test_process_batch_partial_failure(self, mock_call_slack):
+        """Test a batch with undelivered messages returns the slack failure code"""
+        mock_call_slack.side_effect = lambda msg, url: 400 if msg == "bad" else 200
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.enrich = False
+        args.batch = "-"
+
+        with patch('sys.stdin', io.StringIO("good\nbad\n")), \
+                patch('read_me_later.RATE_LIMIT_FILE', self.rate_limit_file):
+            self.assertEqual(read_me_later.process_batch(args), 3)
+
+    # Dedup tests (file backend)
+    def test_check_rate_limit_duplicate(self):
+        """Test that an identical message is rejected within the dedup window"""
+        self.assertTrue(read_me_later.check_rate_limit(self.test_message))
+
+        with patch('sys.stdout', new_callable=io.StringIO) as out:
+            self.assertFalse(read_me_later.check_rate_limit(self.test_message))
+        self.assertIn("Duplicate message", out.getvalue())
+
+        self.assertTrue(read_me_later.check_rate_limit("A different message"))
+
+    def test_check_rate_limit_duplicate_expires(self):
+        """Test that dedup markers expire after the dedup window"""
+        with patch('read_me_later.time.time', return_value=1000):
+            self.assertTrue(read_me_later.check_rate_limit(self.test_message))
+        with patch('read_me_later.time.time', return_value=1000 + read_me_later.DEDUP_WINDOW):
+            self.assertTrue(read_me_later.check_rate_limit(self.test_message))
+
+    @patch('read_me_later.call_slack')
+    def test_process_message_failure_allows_resend(self, mock_call_slack):
+        """Test that a message whose post failed is not treated as a duplicate"""
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.message = self.test_message
+        args.enrich = False
+
+        mock_call_slack.return_value = None
+        self.assertEqual(read_me_later.process_message(args), 3)
+
+        mock_call_slack.return_value = 200
+        self.assertEqual(read_me_later.process_message(args), 0)
+        self.assertEqual(read_me_later.process_message(args), 5)
+
+    @patch('read_me_later.call_slack')
+    def test_process_message_error_status_allows_resend(self, mock_call_slack):
+        """Test that a message Slack rejected (429/5xx) can be retried straight away"""
+        args = MagicMock()
+        args.creds_file = None
+        args.webhook = self.test_webhook
+        args.enrich = False
+
+        for status in (429, 500, 404):
+            with self.subTest(status=status):
+                args.message = "retry after {}".format(status)
+                mock_call_slack.return_value = status
+                self.assertEqual(read_me_later.process_message(args), 3)
+
+                mock_call_slack.return_value = 200
+                self.assertEqual(read_me_later.process_message(args), 0)
+
+    def test_get_state_backend_default(self):
+        """Test that the file backend is used unless a state URL is configured"""
+        self.assertIsInstance(read_me_later.get_state_backend(), read_me_later.FileStateBackend)
+        with patch('read_me_later._state_backend', None), \
+                patch('read_me_later.STATE_BACKEND_URL', 'redis://localhost:6379/0'):
+            backend = read_me_later.get_state_backend()
+        self.assertIsInstance(backend, read_me_later.FallbackStateBackend)
+        self.assertIsInstance(backend.primary, read_me_later.RedisStateBackend)
+        self.assertIsInstance(backend.fallback, read_me_later.FileStateBackend)
+
+    def test_get_state_backend_once_per_process(self):
+        """Test that the state backend, and so its fallback decision, lasts for the whole run"""
+        backend = read_me_later.get_state_backend()
+        self.assertIs(read_me_later.get_state_backend(), backend)
+
+        with patch('read_me_later._state_backend', None), \
+                patch('read_me_later.STATE_BACKEND_URL', 'http://localhost:6379'), \
+                patch('sys.stdout', new_callable=io.StringIO) as out:
+            self.assertIsInstance(read_me_later.get_state_backend(), read_me_later.FileStateBackend)
+        self.assertIn("using local limits", out.getvalue())
+
+    def test_cli_parser_message_and_batch_exclusive(self):
+        """Test --message and --batch can't be combined"""
+        with patch('sys.argv', ['read_me_later.py', '--message', 'x', '--batch', 'file.txt']):
+            with self.assertRaises(SystemExit):
+                read_me_later.cli_parser([])
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Stand-in Redis server speaking RESP; EVAL/EVALSHA run a Python port of RATE_LIMIT_SCRIPT"""
+
+    def handle(self):
+        server = self.server
+        authed = server.password is None
+        connection = []
+        with server.lock:
+            server.connections.append(connection)
+
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            name = command[0].upper()
+            connection.append(name)
+
+            with server.lock:
+                if name == 'AUTH':
+                    authed = command[-1] == server.password
+                    self.reply('+OK' if authed else '-WRONGPASS invalid password')
+                elif not authed:
+                    self.reply('-NOAUTH Authentication required.')
+                elif name == 'SELECT':
+                    server.db = int(command[1])
+                    self.reply('+OK')
+                elif name in ('EVAL', 'EVALSHA'):
+                    if name == 'EVAL':
+                        if command[1] != read_me_later.RATE_LIMIT_SCRIPT:
+                            self.reply('-ERR unknown script')
+                            continue
+                        server.scripts.add(hashlib.sha1(command[1].encode('utf-8')).hexdigest())
+                    elif command[1] not in server.scripts:
+                        self.reply('-NOSCRIPT No matching script. Please use EVAL.')
+                        continue
+                    numkeys = int(command[2])
+                    status, retry_after = server.run_limits(command[3:3 + numkeys], command[3 + numkeys:])
+                    self.reply_array(status, retry_after)
+                elif name == 'DEL':
+                    self.reply(':{}'.format(int(server.markers.pop(command[1], None) is not None)))
+                else:
+                    self.reply("-ERR unknown command '{}'".format(name))
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode('utf-8'))
+        return args
+
+    def reply(self, line):
+        self.wfile.write(line.encode('utf-8') + b'\r\n')
+
+    def reply_array(self, status, number):
+        self.wfile.write(b'*2\r\n$%d\r\n%s\r\n:%d\r\n' % (len(status), status.encode('utf-8'), number))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(('127.0.0.1', 0), FakeRedisHandler)
+        self.password = password
+        self.lock = threading.Lock()
+        self.connections = []
+        self.db = 0
+        self.requests = {}  # sorted set key -> {member: score}
+        self.markers = {}  # key -> expiry (ms)
+        self.scripts = set()  # SHA1s of scripts loaded with EVAL
+
+    def run_limits(self, keys, argv):
+        now = int(time.time() * 1000)
+        window, max_requests, dedup_window, member = int(argv[0]), int(argv[1]), int(argv[2]), argv[3]
+        if len(keys) > 1 and self.markers.get(keys[1], 0) > now:
+            return 'duplicate', 0
+        entries = {m: score for m, score in self.requests.get(keys[0], {}).items() if score > now - window}
+        self.requests[keys[0]] = entries
+        if len(entries) >= max_requests:
+            return 'rate_limited', min(entries.values()) + window - now
+        entries[member] = now
+        if len(keys) > 1:
+            self.markers[keys[1]] = now + dedup_window
+        return 'ok', 0
+
+
+class TestRedisStateBackend(unittest.TestCase):
+    """Shared rate limit/dedup state against a stand-in Redis server"""
+
+    def setUp(self):
+        self.state_backend_patcher = patch('read_me_later._state_backend', None)
+        self.state_backend_patcher.start()
+        self.server = FakeRedisServer()
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        self.url = "redis://127.0.0.1:{}/0".format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.state_backend_patcher.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_rate_limit_shared_across_hosts(self):
+        """Test that two hosts share one budget"""
+        hosts = [read_me_later.RedisStateBackend(self.url), read_me_later.RedisStateBackend(self.url)]
+        for i in range(read_me_later.RATE_LIMIT_MAX_REQUESTS):
+            status, _ = hosts[i % 2].acquire()
+            self.assertEqual(status, read_me_later.STATE_OK)
+
+        for host in hosts:
+            status, retry_after = host.acquire()
+            self.assertEqual(status, read_me_later.STATE_RATE_LIMITED)
+            self.assertGreater(retry_after, 0)
+            self.assertLessEqual(retry_after, read_me_later.RATE_LIMIT_WINDOW)
+
+    def test_batch_budget_shared_across_hosts(self):
+        """Test that batch posts share their own fleet-wide budget, separate from single sends"""
+        hosts = [read_me_later.RedisStateBackend(self.url), read_me_later.RedisStateBackend(self.url)]
+        for i in range(read_me_later.BATCH_RATE_LIMIT_MAX_REQUESTS):
+            status, _ = hosts[i % 2].acquire(batch=True)
+            self.assertEqual(status, read_me_later.STATE_OK)
+
+        for host in hosts:
+            self.assertEqual(host.acquire(batch=True)[0], read_me_later.STATE_RATE_LIMITED)
+        self.assertEqual(hosts[0].acquire()[0], read_me_later.STATE_OK)
+
+    def test_dedup_shared_across_hosts(self):
+        """Test that a message sent by one host is a duplicate on another until forgotten"""
+        first, second = read_me_later.RedisStateBackend(self.url), read_me_later.RedisStateBackend(self.url)
+        digest = read_me_later.message_digest("https://example.com/article")
+
+        self.assertEqual(first.acquire(digest)[0], read_me_later.STATE_OK)
+        self.assertEqual(second.acquire(digest)[0], read_me_later.STATE_DUPLICATE)
+
+        first.forget(digest)
+        self.assertEqual(second.acquire(digest)[0], read_me_later.STATE_OK)
+
+    def test_single_round_trip(self):
+        """Test that AUTH, SELECT and EVALSHA go out as one pipeline on one connection"""
+        self.server.password = "s3cret"
+        url = "redis://:s3cret@127.0.0.1:{}/2".format(self.server.server_address[1])
+        backend = read_me_later.RedisStateBackend(url)
+
+        self.assertEqual(backend.acquire(read_me_later.message_digest("hi"))[0], read_me_later.STATE_OK)
+        self.assertEqual(self.server.db, 2)
+
+        # Everything is written with one sendall before any reply is read
+        sock = MagicMock()
+        sock.makefile.return_value = io.BytesIO(b'+OK\r\n+OK\r\n*2\r\n$2\r\nok\r\n:0\r\n')
+        fresh = read_me_later.RedisStateBackend(url)
+        with patch('read_me_later.socket.create_connection', return_value=sock):
+            self.assertEqual(fresh.acquire(), (read_me_later.STATE_OK, 0))
+        sock.sendall.assert_called_once()
+        payload = sock.sendall.call_args[0][0]
+        self.assertTrue(payload.startswith(b'*2\r\n$4\r\nAUTH\r\n'))
+        self.assertIn(b'$7\r\nEVALSHA\r\n$40\r\n' + read_me_later.RATE_LIMIT_SCRIPT_SHA.encode(), payload)
+        self.assertNotIn(read_me_later.RATE_LIMIT_SCRIPT.encode(), payload)
+
+    def test_connection_kept_and_script_sent_once(self):
+        """Test that one connection serves every check and the script body is only sent on NOSCRIPT"""
+        self.server.password = "s3cret"
+        url = "redis://:s3cret@127.0.0.1:{}/2".format(self.server.server_address[1])
+        backend = read_me_later.RedisStateBackend(url)
+        for i in range(3):
+            self.assertEqual(backend.acquire(read_me_later.message_digest(str(i)))[0], read_me_later.STATE_OK)
+        backend.forget(read_me_later.message_digest("0"))
+
+        self.assertEqual(self.server.connections,
+                         [['AUTH', 'SELECT', 'EVALSHA', 'EVAL', 'EVALSHA', 'EVALSHA', 'DEL']])
+
+        # Another host finds the script already cached
+        other = read_me_later.RedisStateBackend(url)
+        self.assertEqual(other.acquire()[0], read_me_later.STATE_OK)
+        self.assertEqual(self.server.connections[1], ['AUTH', 'SELECT', 'EVALSHA'])
+
+    def test_reconnects_after_server_closes_connection(self):
+        """Test that a kept connection closed by the server is reopened once"""
+        backend = read_me_later.RedisStateBackend(self.url)
+        self.assertEqual(backend.acquire()[0], read_me_later.STATE_OK)
+        backend.sock.shutdown(socket.SHUT_RDWR)
+
+        self.assertEqual(backend.acquire()[0], read_me_later.STATE_OK)
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_wrong_password(self):
+        """Test that error replies are raised"""
+        self.server.password = "s3cret"
+        url = "redis://:wrong@127.0.0.1:{}".format(self.server.server_address[1])
+        with self.assertRaises(read_me_later.RedisError):
+            read_me_later.RedisStateBackend(url).acquire()
+
+    def test_invalid_url(self):
+        """Test that only redis:// and rediss:// URLs are accepted"""
+        with self.assertRaises(ValueError):
+            read_me_later.RedisStateBackend("http://127.0.0.1:6379")
+
+    def test_check_rate_limit_uses_redis(self):
+        """Test check_rate_limit against the configured Redis backend"""
+        with patch('read_me_later.STATE_BACKEND_URL', self.url):
+            self.assertTrue(read_me_later.check_rate_limit("message"))
+            with patch('sys.stdout', new_callable=io.StringIO) as out:
+                self.assertFalse(read_me_later.check_rate_limit("message"))
+            self.assertIn("Duplicate message", out.getvalue())
+
+            read_me_later.release_message("message")
+            self.assertTrue(read_me_later.check_rate_limit("message"))
+
+    def test_check_rate_limit_redis_unreachable(self):
+        """Test that an unreachable state server falls back to local limits"""
+        rate_limit_file = os.path.join(tempfile.mkdtemp(), "rate_limit")
+        try:
+            with patch('read_me_later.STATE_BACKEND_URL', "redis://127.0.0.1:1"), \
+                    patch('read_me_later.RATE_LIMIT_FILE', rate_limit_file), \
+                    patch('sys.stdout', new_callable=io.StringIO) as out:
+                self.assertTrue(read_me_later.check_rate_limit("message"))
+                self.assertFalse(read_me_later.check_rate_limit("message"))
+                for i in range(read_me_later.RATE_LIMIT_MAX_REQUESTS - 1):
+                    self.assertTrue(read_me_later.check_rate_limit("message {}".format(i)))
+                self.assertFalse(read_me_later.check_rate_limit("one too many"))
+
+            # Redis is only tried once per run
+            self.assertEqual(out.getvalue().count("using local limits"), 1)
+            self.assertIn("Rate limit exceeded", out.getvalue())
+        finally:
+            os.remove(rate_limit_file)
+            os.rmdir(os.path.dirname(rate_limit_file))
+
+    def test_fallback_backend_sticks_after_failure(self):
+        """Test that the shared backend isn't retried once it has failed in a run"""
+        primary, fallback = MagicMock(), MagicMock()
+        primary.acquire.side_effect = ConnectionError("down")
+        fallback.acquire.return_value = (read_me_later.STATE_OK, 0)
+        backend = read_me_later.FallbackStateBackend(primary, fallback)
+
+        with patch('sys.stdout', new_callable=io.StringIO):
+            for _ in range(3):
+                self.assertEqual(backend.acquire("digest"), (read_me_later.STATE_OK, 0))
+            backend.forget("digest")
+
+        self.assertEqual(primary.acquire.call_count, 1)
+        self.assertEqual(fallback.acquire.call_count, 3)
+        primary.forget.assert_not_called()
+        fallback.forget.assert_called_once_with("digest")
+
+
+@unittest.skipUnless(shutil.which('redis-server'), "redis-server not installed")
+class TestRealRedisStateBackend(unittest.TestCase):
+    """RATE_LIMIT_SCRIPT itself, run by a real redis-server"""
+
+    @classmethod
+    def setUpClass(cls):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        cls.process = subprocess.Popen(
+            ['redis-server', '--port', str(port), '--bind', '127.0.0.1', '--save', '', '--appendonly', 'no'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        cls.url = "redis://127.0.0.1:{}/0".format(port)
+
+        probe = read_me_later.RedisStateBackend(cls.url)
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                probe.execute(('PING',))
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    cls.process.kill()
+                    raise
+                time.sleep(0.05)
+        probe.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.process.terminate()
+        cls.process.wait(timeout=10)
+
+    def setUp(self):
+        self.backend = read_me_later.RedisStateBackend(self.url)
+        self.backend.execute(('FLUSHALL',))
+        self.backend.execute(('SCRIPT', 'FLUSH'))
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_rate_limit(self):
+        """Test the sliding window limit and the wait until a slot frees up"""
+        for _ in range(read_me_later.RATE_LIMIT_MAX_REQUESTS):
+            self.assertEqual(self.backend.acquire(), (read_me_later.STATE_OK, 0))
+
+        status, retry_after = self.backend.acquire()
+        self.assertEqual(status, read_me_later.STATE_RATE_LIMITED)
+        self.assertGreater(retry_after, read_me_later.RATE_LIMIT_WINDOW - 5)
+        self.assertLessEqual(retry_after, read_me_later.RATE_LIMIT_WINDOW)
+
+        # The batch budget is kept apart
+        self.assertEqual(self.backend.acquire(batch=True), (read_me_later.STATE_OK, 0))
+
+        # Keys expire along with the window
+        ttl = self.backend.execute(('PTTL', read_me_later.STATE_KEY_PREFIX + ':requests'))
+        self.assertGreater(ttl, 0)
+        self.assertLessEqual(ttl, read_me_later.RATE_LIMIT_WINDOW * 1000)
+
+    def test_dedup(self):
+        """Test that a sent message is a duplicate, for DEDUP_WINDOW, until forgotten"""
+        digest = read_me_later.message_digest("https://example.com/article")
+        self.assertEqual(self.backend.acquire(digest)[0], read_me_later.STATE_OK)
+        self.assertEqual(self.backend.acquire(digest)[0], read_me_later.STATE_DUPLICATE)
+
+        marker = read_me_later.STATE_KEY_PREFIX + ':sent:' + digest
+        ttl = self.backend.execute(('PTTL', marker))
+        self.assertGreater(ttl, (read_me_later.DEDUP_WINDOW - 5) * 1000)
+
+        self.backend.forget(digest)
+        self.assertEqual(self.backend.acquire(digest)[0], read_me_later.STATE_OK)
+
+    def test_script_cached_after_first_use(self):
+        """Test that EVALSHA finds the script once EVAL has loaded it"""
+        self.assertEqual(self.backend.execute(('SCRIPT', 'EXISTS', read_me_later.RATE_LIMIT_SCRIPT_SHA)), [0])
+        self.backend.acquire()
+        self.assertEqual(self.backend.execute(('SCRIPT', 'EXISTS', read_me_later.RATE_LIMIT_SCRIPT_SHA)), [1])
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Stand-in web server for link enrichment tests"""
+
+    def do_GET(self):
+        if self.path == '/article':
+            self.send_page('<html><head><title>An  Article</title>'
+                           '<meta name="description" content="All about &amp; more"></head>'
+                           '<body>body</body></html>')
+        elif self.path == '/hostile':
+            self.send_page('<html><head><title>&lt;!channel&gt; news</title>'
+                           '<meta name="description" content="&lt;https://evil.example|click&gt;"></head></html>')
+        elif self.path == '/og':
+            self.send_page('<html><head><meta property="og:title" content="OG Title"></head></html>')
+        elif self.path == '/endless':
+            # Head is never closed and the page never ends; only the byte budget stops the read
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.end_headers()
+            try:
+                self.wfile.write(b'<html><head><title>Endless</title>')
+                for _ in range(10000):
+                    self.wfile.write(b'<!--' + b'x' * 4096 + b'-->')
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        elif self.path == '/trickle':
+            # Never finishes the head, one byte at a time, for longer than any test budget
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.end_headers()
+            try:
+                for _ in range(100):
+                    self.wfile.write(b' ')
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        elif self.path == '/slow':
+            time.sleep(1)
+            self.send_page('<title>Slow</title>')
+        elif self.path == '/image':
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.end_headers()
+            self.wfile.write(b'\x89PNG')
+        else:
+            self.send_error(404)
+
+    def send_page(self, body):
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestEnrichment(unittest.TestCase):
+    """Link enrichment tests against a local HTTP server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), PreviewHandler)
+        cls.server.daemon_threads = True
+        cls.base_url = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.temp_dir, "preview_cache.json")
+        self.cache_patcher = patch('read_me_later.ENRICH_CACHE_FILE', self.cache_file)
+        self.cache_patcher.start()
+
+    def tearDown(self):
+        self.cache_patcher.stop()
+        if os.path.exists(self.cache_file):
+            os.remove(self.cache_file)
+        os.rmdir(self.temp_dir)
+
+    def test_fetch_preview_title_and_description(self):
+        """Test parsing the title and meta description"""
+        preview = read_me_later.fetch_preview(self.base_url + "/article", time.monotonic() + 5)
+        self.assertEqual(preview, {'title': 'An Article', 'description': 'All about & more'})
+
+    def test_fetch_preview_og_title(self):
+        """Test falling back to og:title"""
+        preview = read_me_later.fetch_preview(self.base_url + "/og", time.monotonic() + 5)
+        self.assertEqual(preview['title'], 'OG Title')
+
+    def test_fetch_preview_byte_budget(self):
+        """Test that reading stops at the byte budget"""
+        start = time.monotonic()
+        preview = read_me_later.fetch_preview(self.base_url + "/endless", time.monotonic() + 5)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(preview['title'], 'Endless')
+
+    def test_fetch_preview_trickle_deadline(self):
+        """Test that a server trickling bytes can't hold a fetch past its deadline"""
+        start = time.monotonic()
+        self.assertIsNone(read_me_later.fetch_preview(self.base_url + "/trickle", time.monotonic() + 0.5))
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_enrich_message_deadline_process_exit(self):
+        """Test that the process exits at the enrichment deadline, not when the server stops"""
+        code = ("import sys; sys.path.insert(0, {root!r}); import read_me_later; "
+                "read_me_later.ENRICH_CACHE_FILE = {cache!r}; "
+                "print(read_me_later.enrich_message({url!r}, timeout=0.3))").format(
+            root=os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+            cache=self.cache_file, url=self.base_url + "/slow " + self.base_url + "/trickle")
+
+        start = time.monotonic()
+        with patch.dict(os.environ, {'PYTHONWARNINGS': 'ignore'}):
+            result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=30)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertIn("timed out", result.stdout)
+
+    def test_fetch_preview_non_html(self):
+        """Test that non-HTML responses have no preview"""
+        preview = read_me_later.fetch_preview(self.base_url + "/image", time.monotonic() + 5)
+        self.assertEqual(preview, {'title': None, 'description': None})
+
+    def test_fetch_preview_unreachable(self):
+        """Test that connection errors return None"""
+        self.assertIsNone(read_me_later.fetch_preview("http://127.0.0.1:1/", time.monotonic() + 5))
+        self.assertIsNone(read_me_later.fetch_preview(self.base_url + "/article", time.monotonic() - 1))
+
+    def test_enrich_message(self):
+        """Test enriching a message and caching the previews"""
+        message = "Read {0}/article and {0}/image".format(self.base_url)
+        enriched = read_me_later.enrich_message(message)
+        self.assertEqual(enriched, message + "\n> *An Article* - All about &amp; more")
+
+        # Second call is served from the cache
+        with patch('read_me_later.fetch_preview') as mock_fetch:
+            self.assertEqual(read_me_later.enrich_message(message), enriched)
+            mock_fetch.assert_not_called()
+
+    def test_enrich_message_escapes_page_content(self):
+        """Test that page titles can't inject mentions or disguised links"""
+        url = self.base_url + "/hostile"
+        enriched = read_me_later.enrich_message(url)
+        self.assertEqual(enriched, url + "\n> *&lt;!channel&gt; news* - &lt;https://evil.example|click&gt;")
+        self.assertNotIn("<", enriched)
+
+    def test_enrich_message_cache_expiry(self):
+        """Test that expired cache entries are fetched again"""
+        url = self.base_url + "/article"
+        with open(self.cache_file, 'w') as f:
+            json.dump({url: {'title': 'Stale', 'description': None, 'ts': 0}}, f)
+
+        self.assertIn("An Article", read_me_later.enrich_message(url))
+
+    def test_enrich_message_deadline(self):
+        """Test that the message goes out unenriched when the deadline is hit"""
+        message = "Read {0}/article and {0}/slow".format(self.base_url)
+        start = time.monotonic()
+        self.assertEqual(read_me_later.enrich_message(message, timeout=0.3), message)
+        self.assertLess(time.monotonic() - start, 0.9)
+
+        # The page that did finish is still cached for next time
+        self.assertIn(self.base_url + "/article", read_me_later.load_preview_cache())
+
+    def test_enrich_batch_single_deadline(self):
+        """Test that a batch shares one enrichment deadline across all of its links"""
+        article = self.base_url + "/article"
+        messages = ["first " + article, "second {}/slow {}".format(self.base_url, article), "no links"]
+        start = time.monotonic()
+        enriched = read_me_later.enrich_batch(messages, timeout=0.3)
+        self.assertLess(time.monotonic() - start, 0.9)
+
+        preview = "\n> *An Article* - All about &amp; more"
+        self.assertEqual(enriched, [messages[0] + preview, messages[1] + preview, "no links"])
+
+    def test_enrich_message_too_long(self):
+        """Test that enrichment never pushes a message over the length limit"""
+        url = self.base_url + "/article"
+        message = url + " " + "A" * (read_me_later.MAX_MESSAGE_LENGTH - len(url) - 1)
+        self.assertEqual(read_me_later.enrich_message(message), message)
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file